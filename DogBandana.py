@@ -5,12 +5,33 @@ import sys
 # sys.path.append(os.path.abspath('/usr/local/opt/python-tk@3.11/libexec'))
 
 # Imports
+import argparse
+import cProfile
 import math
 import random
+import tempfile
+import time
 import tkinter as tk
 import tkinter.font
+import tkinter.messagebox
+import threading
+import tracemalloc
+import uuid
 from PIL import Image, ImageTk, ImageFont, ImageDraw, ImageOps
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
+try:
+    # Optional, only used by SessionSimulator to read the memory use on platforms without /proc
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def getFileMode():
+    # The mode a new file would normally get. Files from tempfile.mkstemp are always 0600.
+    umask = os.umask(0)
+    os.umask(umask)
+    return(0o666 & ~umask)
 
 
 class Graphic():
@@ -18,6 +39,8 @@ class Graphic():
     DEFAULTSIZE = (16*30, 9*30)
     DEFAULTTHUMBNAILSIZE = (128, 128)
     SCALEFACTOR = 0.60
+    MAXFONTSIZE = 500
+    REFERENCEFONTSIZE = 100
     
 
     ## Creator
@@ -30,6 +53,7 @@ class Graphic():
         self.text = None
         self.font = None
         self.fontSize = None
+        self.fit = None
         self.targetSize = None
         self.basename = None
 
@@ -86,6 +110,7 @@ class Graphic():
         if (self.text != givenText):
             self.text = givenText
             self.image = None
+            self.fit = None
     
         
     def getSize(self):
@@ -98,6 +123,7 @@ class Graphic():
         if (self.targetSize != givenSize):
             self.targetSize = givenSize
             self.image = None
+            self.fit = None
 
             
     def getImage(self, givenSize=None):
@@ -136,16 +162,50 @@ class Graphic():
         return(w <= self.SCALEFACTOR * self.targetSize[0] and h <= self.SCALEFACTOR * self.targetSize[1])
         
 
+    def getFit(self):
+        # Returns (font size, coverage, text height) for the largest font size that fits the text in the target size.
+        # Coverage is the fraction of the target area taken up by the inked text, and text height its height in pixels.
+        assert(self.text)
+        if (self.fit):
+            return(self.fit)
+        if (not self.targetSize):
+            self.targetSize = self.DEFAULTSIZE
+
+        # Text size grows about linearly with font size, so one measurement gives a close estimate
+        _, _, w, h = self.__getFont(self.REFERENCEFONTSIZE).getbbox(self.text)
+        fontSize = self.REFERENCEFONTSIZE
+        if (w > 0 and h > 0):
+            fontSize = int(self.REFERENCEFONTSIZE * min(self.SCALEFACTOR * self.targetSize[0] / w, self.SCALEFACTOR * self.targetSize[1] / h))
+        fontSize = max(1, min(fontSize, self.MAXFONTSIZE))
+        # Then correct the estimate by a step or two
+        while (fontSize > 1 and not self.__textCanFit(fontSize)):
+            fontSize = fontSize - 1
+        while (fontSize < self.MAXFONTSIZE and self.__textCanFit(fontSize + 1)):
+            fontSize = fontSize + 1
+
+        left, top, right, bottom = self.__getFont(fontSize).getbbox(self.text)
+        self.fit = (fontSize, ((right - left) * (bottom - top)) / (self.targetSize[0] * self.targetSize[1]), bottom - top)
+        return(self.fit)
+
+
+    def getFitSize(self):
+        return(self.getFit()[0])
+
+
+    def getCoverage(self):
+        return(self.getFit()[1])
+
+
+    def getTextHeight(self):
+        return(self.getFit()[2])
+
+
     def __getTextImage(self):
         assert(self.text)
         assert(self.targetSize)
         assert(self.filename)
 
-        # TODO: Implement a more efficient binary search algorithm to find the perfect font size
-        fontSize = 500
-        while (not self.__textCanFit(fontSize)):
-            fontSize = fontSize - 10
-        # The best font size has been found
+        fontSize = self.getFitSize()
         
         self.image = Image.new("RGBA", self.targetSize, (255, 255, 255, 0))
         assert(self.image)
@@ -234,11 +294,94 @@ class Overlay():
         return(ImageOps.mirror(self.getImage()))
 
 
+class Exporter():
+    ## Private Constants
+    # Encoder name: (PIL format, file extension, default save options)
+    ENCODERS = {
+        'png': ('PNG', '.png', {'compress_level': 6}),
+        'webp': ('WEBP', '.webp', {'quality': 90, 'method': 4}),
+        'tiff': ('TIFF', '.tiff', {'compression': 'tiff_deflate', 'strip_size': 256*1024}),
+    }
+    PROOFENCODER = 'webp'
+    PRINTENCODER = 'tiff'
+
+    ### Creator
+    def __init__(self, givenDirectory, givenWorkers=None):
+        ## Private Attributes
+        self.directory = givenDirectory
+        self.fileMode = getFileMode()
+        # PIL lets go of the GIL while encoding, so threads compress in parallel
+        self.pool = ThreadPoolExecutor(max_workers=givenWorkers, thread_name_prefix='Exporter')
+
+        os.makedirs(self.directory, exist_ok=True)
+
+
+    def __save(self, givenImage, givenFilename, givenFormat, givenOptions):
+        # Write to a temporary file in the same directory, then swap it in, so a half written file never shows up
+        fd, temporaryFilename = tempfile.mkstemp(dir=self.directory, prefix='.', suffix='.tmp')
+        os.close(fd)
+        try:
+            givenImage.save(temporaryFilename, givenFormat, **givenOptions)
+            os.chmod(temporaryFilename, self.fileMode)
+            os.replace(temporaryFilename, givenFilename)
+        except Exception as e:
+            print(e)
+            print('Cannot write image file:', givenFilename)
+            if (os.path.isfile(temporaryFilename)):
+                os.remove(temporaryFilename)
+            raise
+        return(givenFilename)
+
+
+    def getDirectory(self):
+        return(self.directory)
+
+
+    def export(self, givenImage, givenName, givenEncoder='png', **givenOptions):
+        # Returns a future holding the filename once the image has been written
+        assert(givenImage)
+        assert(givenName)
+        assert(givenEncoder in self.ENCODERS)
+        if (os.path.basename(givenName) != givenName):
+            raise ValueError('Export name must not contain a directory: ' + givenName)
+        imageFormat, extension, defaultOptions = self.ENCODERS[givenEncoder]
+        options = dict(defaultOptions, **givenOptions)
+        filename = os.path.join(self.directory, givenName + extension)
+        # Each job gets its own copy: PIL keeps the save options on the image while saving,
+        # so saving one image in several formats at once would mix them up
+        return(self.pool.submit(self.__save, givenImage.copy(), filename, imageFormat, options))
+
+
+    def exportOverlay(self, givenOverlay, givenName, givenProofEncoder=None, givenPrintEncoder=None):
+        # Render here, encode on the pool. Returns the futures for the proof and print master.
+        if (not givenProofEncoder):
+            givenProofEncoder = self.PROOFENCODER
+        if (not givenPrintEncoder):
+            givenPrintEncoder = self.PRINTENCODER
+        proof = self.export(givenOverlay.getImage(), givenName + '-proof', givenProofEncoder)
+        master = self.export(givenOverlay.getPrintImage(), givenName + '-print', givenPrintEncoder)
+        return((proof, master))
+
+
+    def close(self):
+        # Waits for every export that is still running
+        self.pool.shutdown(wait=True)
+
+
 class ImageLibrary():
 
     ### Private Constants
     IMAGEEXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif')
     FONTEXTENSIONS = ('.ttf', '.otf', 'ttc')
+    # Smallest legible text, as its inked height over the height of the text box
+    MINTEXTFRACTION = 0.04
+    # Normalized copies of the images are kept in this subdirectory of the library
+    CACHEDIRECTORY = '.normalized'
+    SIXTEENBITMODES = ('I', 'I;16', 'I;16B', 'I;16L', 'I;16N')
+
+    ### Shared between all libraries
+    # (filename, modification time): whether the font can be used, so each font file is only checked once
+    validFontList = {}
 
     
     ### Creator
@@ -252,10 +395,20 @@ class ImageLibrary():
         for filename in os.listdir(self.directory):
             if (givenText):
                 if (filename.lower().endswith(self.FONTEXTENSIONS)):
-                    self.graphicList.append(Graphic(os.path.join(self.directory, filename), givenText, givenSize))
+                    if (self.__validFont(os.path.join(self.directory, filename))):
+                        self.graphicList.append(Graphic(os.path.join(self.directory, filename), givenText, givenSize))
             else:
                 if (filename.lower().endswith(self.IMAGEEXTENSIONS)):
-                    self.graphicList.append(Graphic(os.path.join(self.directory, filename)))
+                    normalizedFilename = self.__normalizeImage(os.path.join(self.directory, filename))
+                    if (normalizedFilename):
+                        self.graphicList.append(Graphic(normalizedFilename))
+        if (not self.graphicList):
+            # Nothing to pick from, better to say so now than fail on the first random choice
+            if (givenText):
+                raise ValueError('No usable fonts in ' + self.directory)
+            raise ValueError('No usable images in ' + self.directory)
+        if (givenText):
+            self.rankByFit()
 
     def __iter__(self):
         self.currentItem = 0
@@ -269,7 +422,92 @@ class ImageLibrary():
         else:
             raise StopIteration
 
+    def __validFont(self, givenFilename):
+        key = (givenFilename, os.path.getmtime(givenFilename))
+        if (key in ImageLibrary.validFontList):
+            return(ImageLibrary.validFontList[key])
+        # Else
+        try:
+            ImageFont.truetype(givenFilename, Graphic.REFERENCEFONTSIZE).getbbox('Ag')
+            ImageLibrary.validFontList[key] = True
+        except Exception as e:
+            print(e)
+            print('Skipping font file:', givenFilename)
+            ImageLibrary.validFontList[key] = False
+        return(ImageLibrary.validFontList[key])
+
+
+    def __usableCache(self, givenFilename, givenCacheFilename):
+        # The copy has to be newer than the original and readable by whoever is running now
+        if (not os.path.isfile(givenCacheFilename)):
+            return(False)
+        if (os.path.getmtime(givenCacheFilename) < os.path.getmtime(givenFilename)):
+            return(False)
+        try:
+            with Image.open(givenCacheFilename) as image:
+                mode = image.mode
+                image.verify()
+        except Exception as e:
+            print(e)
+            print('Rebuilding normalized image:', givenCacheFilename)
+            return(False)
+        return(mode == 'RGBA')
+
+
+    def __normalizeImage(self, givenFilename):
+        # Returns the filename of an RGBA copy of the image, so compositing never has to convert modes,
+        # or None if the image can't be read. The copy is only made again when the original changes.
+        cacheDirectory = os.path.join(os.path.dirname(givenFilename), self.CACHEDIRECTORY)
+        cacheName = os.path.basename(givenFilename)
+        if (not cacheName.lower().endswith('.png')):
+            cacheName = cacheName + '.png'
+        cacheFilename = os.path.join(cacheDirectory, cacheName)
+        if (self.__usableCache(givenFilename, cacheFilename)):
+            return(cacheFilename)
+        # Else
+        try:
+            image = Image.open(givenFilename)
+            image.load()
+        except Exception as e:
+            print(e)
+            print('Skipping image file:', givenFilename)
+            return(None)
+        if (image.mode in self.SIXTEENBITMODES):
+            # Scale 16 bit greyscale down to 8 bits, a plain convert would clip it
+            image = image.convert('I').point(lambda i: i * (1/256)).convert('L')
+        image = image.convert('RGBA')
+
+        # Write to a temporary file and swap it in so a half written copy is never used
+        temporaryFilename = None
+        try:
+            os.makedirs(cacheDirectory, exist_ok=True)
+            fd, temporaryFilename = tempfile.mkstemp(dir=cacheDirectory, prefix='.', suffix='.tmp')
+            os.close(fd)
+            image.save(temporaryFilename, 'PNG', compress_level=1)
+            os.chmod(temporaryFilename, getFileMode())
+            os.replace(temporaryFilename, cacheFilename)
+        except Exception as e:
+            print(e)
+            print('Cannot write normalized image, using the original:', givenFilename)
+            if (temporaryFilename and os.path.isfile(temporaryFilename)):
+                os.remove(temporaryFilename)
+            return(givenFilename)
+        return(cacheFilename)
+
+
     ### Methods
+
+    def rankByFit(self):
+        # Order the fonts by how much of the box the fitted text covers, without drawing anything.
+        # Point sizes aren't comparable between fonts, so the measured text is used instead.
+        # Fonts that can't show the text legibly are dropped, but the best one is always kept.
+        self.graphicList.sort(key=lambda i: i.getCoverage(), reverse=True)
+        legibleList = [i for i in self.graphicList if i.getTextHeight() >= self.MINTEXTFRACTION * i.targetSize[1]]
+        if (legibleList):
+            self.graphicList = legibleList
+        else:
+            self.graphicList = self.graphicList[:1]
+
     
     def setThumbnailSize(self, givenSize):
         self.thumbnailSize = givenSize
@@ -503,12 +741,15 @@ class OrderForm(tk.Frame):
 class App(tk.Tk):
     ## Private constants
     ASSETDIR = './Assets'
+    OUTPUTDIR = './Output'
     MAINPAGE = 1
     ORDERFORM = 2
     BACKGROUNDGALLERY = 3
     FONTGALLERY = 4
     IMAGEPREVIEW = 5    
     PREVIEWSIZE = (450, 450)
+    PRINTSIZE = (16*100, 9*100)
+    EXPORTCHECKTIME = 200
     WINDOWSIZE = (1280, 800)
 
     ## Creator
@@ -531,6 +772,8 @@ class App(tk.Tk):
         self.petName = None
         self.currentFrame = None
         self.size = None
+        self.exporter = None
+        self.fontLibrarySize = None
         
         #self.geometry('1280x720')
         self.configure(background='white')
@@ -562,9 +805,50 @@ class App(tk.Tk):
         self.orderForm.pack_forget()
         self.showMode(App.FONTGALLERY)
         
+    def getExporter(self):
+        if (self.exporter):
+            return(self.exporter)
+        # Else
+        self.exporter = Exporter(self.OUTPUTDIR)
+        return(self.exporter)
+
+
+    def getOrderName(self):
+        # A file name for this order, made only from the safe characters of the pet name
+        safeName = ''.join([i for i in self.getPetName() if i.isascii() and (i.isalnum() or i in '-_')])
+        if (not safeName):
+            safeName = 'bandana'
+        return(safeName + time.strftime('-%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6])
+
+
     def printImage(self):
-        print('App', 'printImage')
-        
+        # Use a separate text graphic so the preview keeps its own rendering
+        myText = Graphic(self.getText().getFilename(), self.getPetName())
+        myOverlay = Overlay(self.getBackground(), myText, self.PRINTSIZE)
+        orderName = self.getOrderName()
+        futureList = self.getExporter().exportOverlay(myOverlay, orderName)
+        self.after(self.EXPORTCHECKTIME, self.checkExport, orderName, futureList)
+
+
+    def checkExport(self, givenOrderName, givenFutureList):
+        # The exports finish on worker threads, so check on them from here where it's safe to use Tk
+        if (not all([i.done() for i in givenFutureList])):
+            self.after(self.EXPORTCHECKTIME, self.checkExport, givenOrderName, givenFutureList)
+            return()
+        # Else
+        for i in givenFutureList:
+            if (i.exception()):
+                print('Export failed for order:', givenOrderName)
+                tkinter.messagebox.showerror('Print failed', 'Order ' + givenOrderName + ' was not saved:\n' + str(i.exception()))
+                return()
+
+
+    def destroy(self):
+        # Let any exports that are still running finish before quitting
+        if (self.exporter):
+            self.exporter.close()
+        tk.Tk.destroy(self)
+
     
     def changeEntries(self, event):
         entryList = self.orderForm.getEntryList()
@@ -616,7 +900,9 @@ class App(tk.Tk):
         if (self.fontLibrary):
             return(self.fontLibrary)
         # Else
-        self.fontLibrary = ImageLibrary(os.path.join(self.ASSETDIR, 'Font'), self.getPetName())
+        # Rank the fonts at the size the text will be drawn in the preview
+        self.fontLibrarySize = self.getTextSize()
+        self.fontLibrary = ImageLibrary(os.path.join(self.ASSETDIR, 'Font'), self.getPetName(), self.fontLibrarySize)
         return(self.fontLibrary)
 
 
@@ -639,11 +925,26 @@ class App(tk.Tk):
     def setBackground(self, givenBackground):
         self.background = givenBackground
         self.preview = None
+        if (self.fontLibrary and self.fontLibrarySize != self.getTextSize()):
+            # The text box changed shape, so the fonts need ranking again
+            self.fontLibrary = None
+            self.fontGallery = None
         if (self.orderForm):
             self.orderForm.setPreview(self.getPreview())
         self.update()
 
 
+    def getTextSize(self):
+        # The preview shrinks the background to fit PREVIEWSIZE and draws the text over all of it.
+        # Same arithmetic as ImageOps.contain.
+        w, h = self.getBackground().getImage().size
+        if (w / h > self.PREVIEWSIZE[0] / self.PREVIEWSIZE[1]):
+            return((self.PREVIEWSIZE[0], round(h / w * self.PREVIEWSIZE[0])))
+        if (w / h < self.PREVIEWSIZE[0] / self.PREVIEWSIZE[1]):
+            return((round(w / h * self.PREVIEWSIZE[1]), self.PREVIEWSIZE[1]))
+        return(self.PREVIEWSIZE)
+
+
     def getText(self):
         if (self.text):
             return(self.text)
@@ -740,7 +1041,226 @@ class App(tk.Tk):
 
 
 
+class SessionSimulator():
+    ## Private Constants
+    PETNAMES = ('Rover', 'Bo', 'Princess Sugar Cookie', 'Maximilian', 'Sir Barks-a-Lot the Third', 'Checkers')
+    WINDOWSIZES = ((1280, 800), (1024, 768), (1600, 900), (800, 600))
+    PERCENTILES = (50, 90, 99)
+    FLOWS = ('setPetName', 'changeFont', 'resize', 'fontSelect', 'changeBackground', 'backgroundSelect')
+    DEFAULTROUNDS = 10
+    # Seconds between memory samples when psutil is used
+    SAMPLETIME = 0.002
+
+    ### Creator
+    def __init__(self, givenApp, givenRounds=None, givenProfileDirectory=None):
+        ## Private Attributes
+        self.app = givenApp
+        self.rounds = givenRounds
+        self.profileDirectory = givenProfileDirectory
+        self.latencyList = {}
+        self.peakMemory = {}
+        self.growthMemory = {}
+        self.profileList = {}
+        self.memorySource = None
+        self.sampler = None
+        self.samplerStop = None
+        self.samplerPeak = 0
+
+        if (not self.rounds):
+            self.rounds = self.DEFAULTROUNDS
+        assert(self.rounds >= 1)
+        for flow in self.FLOWS:
+            self.latencyList[flow] = []
+            self.peakMemory[flow] = 0
+            self.growthMemory[flow] = 0
+            if (self.profileDirectory):
+                self.profileList[flow] = cProfile.Profile()
+
+        # Pick how to find the most memory used while a flow runs
+        try:
+            with open('/proc/self/clear_refs', 'w') as clearRefs:
+                clearRefs.write('5')
+            self.memorySource = 'proc'
+        except OSError:
+            if (psutil):
+                self.memorySource = 'psutil'
+            else:
+                # Only sees memory allocated by Python, not by PIL or Tk
+                self.memorySource = 'tracemalloc'
+                tracemalloc.start()
+
+
+    def __getMemory(self):
+        # The current memory use in bytes
+        if (self.memorySource == 'proc'):
+            with open('/proc/self/statm') as statm:
+                return(int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE'))
+        if (self.memorySource == 'psutil'):
+            return(psutil.Process().memory_info().rss)
+        return(tracemalloc.get_traced_memory()[0])
+
+
+    def __sampleMemory(self):
+        # Runs on its own thread while a flow runs, psutil can't tell the peak otherwise
+        while (not self.samplerStop.is_set()):
+            self.samplerPeak = max(self.samplerPeak, self.__getMemory())
+            self.samplerStop.wait(self.SAMPLETIME)
+
+
+    def __startPeak(self):
+        if (self.memorySource == 'proc'):
+            # Resets VmHWM in /proc/self/status to the current RSS
+            with open('/proc/self/clear_refs', 'w') as clearRefs:
+                clearRefs.write('5')
+        elif (self.memorySource == 'psutil'):
+            self.samplerPeak = 0
+            self.samplerStop = threading.Event()
+            self.sampler = threading.Thread(target=self.__sampleMemory, daemon=True)
+            self.sampler.start()
+        else:
+            tracemalloc.reset_peak()
+
+
+    def __stopPeak(self):
+        # The most memory used since __startPeak, in bytes
+        if (self.memorySource == 'proc'):
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if (line.startswith('VmHWM:')):
+                        return(int(line.split()[1]) * 1024)
+            assert(False)
+        if (self.memorySource == 'psutil'):
+            self.samplerStop.set()
+            self.sampler.join()
+            return(max(self.samplerPeak, self.__getMemory()))
+        return(tracemalloc.get_traced_memory()[1])
+
+
+    def __measure(self, givenFlow, givenAction):
+        # Time from the simulated event until Tk has repainted the result.
+        # The profiler runs outside the timed part, though its overhead on the calls still shows up.
+        profile = self.profileList.get(givenFlow)
+        before = self.__getMemory()
+        self.__startPeak()
+        if (profile):
+            profile.enable()
+        start = time.perf_counter()
+        givenAction()
+        self.app.update()
+        elapsed = time.perf_counter() - start
+        if (profile):
+            profile.disable()
+        peak = self.__stopPeak()
+        after = self.__getMemory()
+        self.latencyList[givenFlow].append(elapsed)
+        self.peakMemory[givenFlow] = max(self.peakMemory[givenFlow], peak)
+        self.growthMemory[givenFlow] = max(self.growthMemory[givenFlow], after - before)
+
+
+    def __getTiles(self):
+        # The gallery buttons with thumbnails are direct children, the Cancel button is not
+        return([i for i in self.app.currentFrame.winfo_children() if isinstance(i, tk.Button)])
+
+
+    def __waitForGallery(self):
+        # The gallery waits for any resizing to settle before it refills itself
+        gallery = self.app.currentFrame
+        while (gallery.resizeTimer):
+            time.sleep(0.001)
+            self.app.update()
+
+
+    def __selectTile(self):
+        self.__waitForGallery()
+        tiles = self.__getTiles()
+        if (not tiles):
+            raise RuntimeError('The ' + type(self.app.currentFrame).__name__ + ' shown has no tiles to select')
+        random.choice(tiles).invoke()
+
+
+    def __resize(self):
+        gallery = self.app.currentFrame
+        size = random.choice([i for i in self.WINDOWSIZES if i != gallery.getSize()])
+        self.app.geometry(str(size[0])+'x'+str(size[1]))
+        self.app.update()
+        self.__waitForGallery()
+
+
+    def __setPetName(self):
+        name = random.choice([i for i in self.PETNAMES if i != self.app.getPetName()])
+        self.app.setPetName(name)
+
+
+    def run(self):
+        for _ in range(self.rounds):
+            self.__measure('setPetName', self.__setPetName)
+            self.__measure('changeFont', self.app.changeFont)
+            # Resize the font gallery since a new pet name always builds a fresh one
+            self.__measure('resize', self.__resize)
+            self.__measure('fontSelect', self.__selectTile)
+            self.__measure('changeBackground', self.app.changeBackground)
+            self.__measure('backgroundSelect', self.__selectTile)
+
+        if (self.profileDirectory):
+            os.makedirs(self.profileDirectory, exist_ok=True)
+            for flow in self.FLOWS:
+                self.profileList[flow].dump_stats(os.path.join(self.profileDirectory, flow+'.prof'))
+
+
+    def getPercentile(self, givenFlow, givenPercent):
+        # Nearest-rank percentile, in milliseconds
+        ordered = sorted(self.latencyList[givenFlow])
+        assert(ordered)
+        index = max(0, math.ceil(givenPercent / 100 * len(ordered)) - 1)
+        return(1000 * ordered[index])
+
+
+    def getPeakMemory(self, givenFlow):
+        # The most memory in use before or after any run of the flow, in bytes
+        return(self.peakMemory[givenFlow])
+
+
+    def getGrowthMemory(self, givenFlow):
+        # The most memory any single run of the flow added, in bytes
+        return(self.growthMemory[givenFlow])
+
+
+    def report(self):
+        lines = ['%-18s %5s' % ('flow', 'n') + ''.join(['%10s' % ('p'+str(p)+' ms') for p in self.PERCENTILES]) + '%12s%12s' % ('peak MB', 'growth MB')]
+        for flow in self.FLOWS:
+            line = '%-18s %5d' % (flow, len(self.latencyList[flow]))
+            line = line + ''.join(['%10.1f' % self.getPercentile(flow, p) for p in self.PERCENTILES])
+            line = line + '%12.1f%12.1f' % (self.getPeakMemory(flow) / (1024*1024), self.getGrowthMemory(flow) / (1024*1024))
+            lines.append(line)
+        if (self.memorySource == 'tracemalloc'):
+            lines.append('Memory is the Python heap only (tracemalloc), PIL and Tk allocations are not counted.')
+        else:
+            lines.append('Memory is RSS (' + self.memorySource + '), peak is the high-water mark while the flow ran.')
+        if (self.profileDirectory):
+            lines.append('Profiled run: latencies include cProfile overhead and are not comparable to unprofiled runs.')
+        return('\n'.join(lines))
+
+
+def positiveInteger(givenText):
+    value = int(givenText)
+    if (value < 1):
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return(value)
+
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dog bandana order kiosk')
+    parser.add_argument('--simulate', type=positiveInteger, metavar='ROUNDS', help='run a scripted session and report UI latency instead of starting the kiosk')
+    parser.add_argument('--profile', metavar='DIRECTORY', help='with --simulate, write cProfile stats for each flow into DIRECTORY')
+    args = parser.parse_args()
+
     myApp = App()
+    if (args.simulate):
+        mySimulator = SessionSimulator(myApp, args.simulate, args.profile)
+        mySimulator.run()
+        print(mySimulator.report())
+        myApp.destroy()
+        exit()
     myApp.mainloop()
     exit()
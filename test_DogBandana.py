@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+from PIL import Image
+
+from DogBandana import Exporter
+
+
+class ExporterTest(unittest.TestCase):
+
+    def test_concurrent_exports_of_one_image(self):
+        # The same image saved in several formats at once must not share save options
+        myImage = Image.new('RGBA', (400, 300), (200, 100, 50, 255))
+        with tempfile.TemporaryDirectory() as directory:
+            myExporter = Exporter(directory, 8)
+            futureList = []
+            for i in range(20):
+                for encoder in ('webp', 'png', 'tiff'):
+                    futureList.append(myExporter.export(myImage, encoder + str(i), encoder))
+            myExporter.close()
+
+            for future in futureList:
+                filename = future.result()
+                with Image.open(filename) as written:
+                    self.assertEqual(written.size, myImage.size)
+            self.assertEqual(len([i for i in os.listdir(directory) if not i.startswith('.')]), len(futureList))
+            self.assertFalse(hasattr(myImage, 'encoderinfo'))
+
+
+if __name__ == '__main__':
+    unittest.main()